@@ -1,21 +1,19 @@
 import asyncio
+import functools
+import getpass
+import hashlib
 import os
 from dotenv import load_dotenv
-import json
-import sqlite3
-from typing import List, TypedDict, Annotated, Optional
-from langchain_core.messages import HumanMessage, AnyMessage, SystemMessage
+import orjson
+from prompt_toolkit import PromptSession
+from typing import TypedDict, Annotated
+from langchain_core.messages import HumanMessage, AnyMessage, SystemMessage, ToolMessage, RemoveMessage, trim_messages
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langgraph.graph.message import add_messages
-from langchain_core.prompts import PromptTemplate
-from langgraph.graph import StateGraph, START, END
+from langgraph.graph import StateGraph, START
 from langgraph.prebuilt import ToolNode, tools_condition
-from IPython.display import Image, display
-from tools import TransactionDetails, DATABASE_FILE, setup_database, extract_transaction_details, create_invoice, get_ledger_data
+from tools import setup_database, extract_transaction_details, create_invoice, get_ledger_data
 from langgraph.checkpoint.redis.aio import AsyncRedisSaver
-from langgraph.types import interrupt # For HITL
-from langgraph.types import Command
-from langchain_core.messages import ToolMessage
 
 
 load_dotenv()
@@ -38,25 +36,34 @@ local_tools = [
 ]
 
 
-# Initialise the LLM
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+# Initialise the LLM on first use so importing this module stays cheap
+@functools.lru_cache(maxsize=1)
+def get_llm():
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+
+
+# Bind the tools once; the bound runnable is reused on every turn
+@functools.lru_cache(maxsize=1)
+def get_llm_with_tools():
+    return get_llm().bind_tools(local_tools)
 
 
 # System Message
-sys_msg = SystemMessage(content=f"""
+# Kept byte-for-byte identical across turns so Gemini's implicit prompt caching can reuse the prefix
+sys_msg = SystemMessage(content="""
 You are an ERP Assistant for invoice processing.
 
 Tools:
 - extract_transaction_details(text): Parse transaction from natural language
 - create_invoice(company, amount, product, quantity): Store in database
-- get_ledger_data(): Show all transactions
+- get_ledger_data(limit): Show the most recent transactions (default 50)
 
 Note: The system will require manual approval before create_invoice executes.
 
 Instructions:
 - Extract EXACT details from user text (no invented data)
 - Handle currency/numbers correctly
-- For "show/display" requests, use get_ledger_data()
+- For "show/display" requests, use get_ledger_data(); pass limit only if the user asks for a specific number
 - Return clear, user-friendly messages
 
 Examples:
@@ -65,19 +72,51 @@ Examples:
 """)
 
 
+# Number of most recent messages kept in the conversation state
+MAX_HISTORY_MESSAGES = 40
+
+
+#--------------------------------Graph Diagram-----------------------------------------------------
+def draw_graph(app, path: str = "graph.png"):
+    """Renders the graph to a PNG, skipping the render if the topology is unchanged since the last one."""
+    graph = app.get_graph()
+    source = graph.draw_mermaid()
+    source_path = os.path.splitext(path)[0] + ".mmd"
+    
+    if os.path.exists(path) and os.path.exists(source_path):
+        with open(source_path, encoding="utf-8") as f:
+            if f.read() == source:
+                return
+    
+    image_data = graph.draw_mermaid_png()
+    with open(path, "wb") as f:
+        f.write(image_data)
+    with open(source_path, "w", encoding="utf-8") as f:
+        f.write(source)
+
+
 #--------------------------------Build the Graph -----------------------------------------------------
 async def build_graph(checkpointer):
     
     builder = StateGraph(AgentState)
     
-    llm_with_tools = llm.bind_tools(local_tools)
-    
     #------------------------------------AI ASSISTANT---------------------------------------
     async def assistant(state: AgentState):
         
-        response = await llm_with_tools.ainvoke([sys_msg] + state["messages"])    
+        # Keep only the recent window (starting on a user turn) so the prompt and the
+        # Redis checkpoint stay bounded instead of growing with the whole session
+        history = trim_messages(
+            state["messages"],
+            strategy="last",
+            token_counter=len,
+            max_tokens=MAX_HISTORY_MESSAGES,
+            start_on="human",
+        ) or state["messages"]
+        kept = {m.id for m in history}
+        
+        response = await get_llm_with_tools().ainvoke([sys_msg, *history])
         return{
-            "messages": [response],
+            "messages": [RemoveMessage(id=m.id) for m in state["messages"] if m.id not in kept] + [response],
         }
 
     # 2. Nodes & Edges
@@ -90,21 +129,44 @@ async def build_graph(checkpointer):
     # BREAKPOINT: This stops the graph BEFORE the "tools" node executes.
     app = builder.compile(checkpointer=checkpointer, interrupt_before=["tools"])
     
-    # Generate PNG image of the graph
-    image_data = app.get_graph().draw_mermaid_png()
-    with open("graph.png", "wb") as f:
-        f.write(image_data)
+    # Generate PNG image of the graph (opt-in: rendering is a round-trip to mermaid.ink)
+    if os.getenv("DRAW_GRAPH"):
+        draw_graph(app)
         
     return app
 
 
 
 #---------------------------------------CHAT INTERFACE-----------------------------------------
+EXIT_COMMANDS = frozenset({"exit", "quit", "q", ":q"})
+
+# Session owner when neither BULWARK_USER nor the OS login name is available
+DEFAULT_USER = "default"
+
+
+def session_thread_id(user_id: str) -> str:
+    """Derives a stable, per-user LangGraph thread id so users never share a checkpoint."""
+    return hashlib.blake2b(user_id.encode(), digest_size=8).hexdigest()
+
+
+def _login_name() -> str:
+    # getpass fails for a UID with no passwd entry and no LOGNAME/USER (common in containers)
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return DEFAULT_USER
+
+
 async def chat_interface(graph):
     # Initialize database
     await setup_database()
     
-    config = {"configurable": {"thread_id": "erp_session_v1"}}
+    user_id = os.getenv("BULWARK_USER") or _login_name()
+    config = {"configurable": {"thread_id": session_thread_id(user_id)}}
+    
+    # Async prompts keep the event loop (and the ledger writer callbacks) running while
+    # waiting for input, and Ctrl-C still interrupts them immediately
+    session = PromptSession()
     
     print("""
           
@@ -119,7 +181,7 @@ async def chat_interface(graph):
                                                                                                    
 """)
     print("Example: 'Amazon paid $40000 for 5 GPUs'")
-    print("Type 'exit' or 'quit' to end the session.")
+    print("Type 'exit', 'quit', 'q' or ':q' to end the session.")
     
     while True:
             # Get current state to see if we are at a breakpoint
@@ -135,10 +197,15 @@ async def chat_interface(graph):
                     if invoice_calls:
                         print(f"\n[SYSTEM] Action required for invoice creation.")
                         for tc in invoice_calls:
-                            print(f"Details: {tc['args']}")
-                        
-                        choice = input("\nApprove this transaction? (yes/no): ").strip().lower()
+                            print(f"Details:\n{orjson.dumps(tc['args'], option=orjson.OPT_INDENT_2).decode()}")
                         
+                        try:
+                            choice = (await session.prompt_async("\nApprove this transaction? (yes/no): ")).strip().lower()
+                        except EOFError:
+                            # Ctrl-D ends the session like at the main prompt; nothing is
+                            # written and the pending call is asked about again next time
+                            break
+
                         if choice == "yes":
                             print("Proceeding...")
                             # Stream the tool execution and the subsequent LLM response
@@ -159,8 +226,11 @@ async def chat_interface(graph):
                         continue 
 
             # 2. HANDLE NORMAL INPUT
-            user_input = input("\nYou: ").strip()
-            if user_input.lower() in ('exit', 'quit'): break
+            try:
+                user_input = (await session.prompt_async("\nYou: ")).strip()
+            except EOFError:
+                break
+            if user_input.lower() in EXIT_COMMANDS: break
             if not user_input: continue
 
             # We use astream to see the transition through nodes
@@ -178,7 +248,7 @@ async def chat_interface(graph):
     
 # ----------------------------------------RUN----------------------------------------------    
 async def run_app():
-    async with AsyncRedisSaver.from_conn_string("redis://localhost:6379") as checkpointer:
+    async with AsyncRedisSaver.from_conn_string(os.getenv("REDIS_URL", "redis://localhost:6379")) as checkpointer:
         graph = await build_graph(checkpointer)
         await chat_interface(graph)
 
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# main.py and tools.py live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools  # noqa: E402
+
+
+@pytest.fixture
+def ledger_db(tmp_path, monkeypatch):
+    """Points tools at a fresh database file and yields its shared connection."""
+    monkeypatch.setattr(tools, "DATABASE_FILE", str(tmp_path / "ledger.db"))
+    monkeypatch.setattr(tools, "_CONN", None)
+    tools._create_schema()
+    conn = tools._get_connection()
+    yield conn
+    conn.close()
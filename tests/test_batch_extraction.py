@@ -0,0 +1,105 @@
+import asyncio
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from google import genai
+from google.genai import batches
+
+import tools
+
+
+class FakeBatches:
+    """Stands in for client.aio.batches, replaying a scripted sequence of job states."""
+
+    def __init__(self, states, responses):
+        self.states = list(states)
+        self.responses = responses
+        self.requests = None
+
+    def _job(self):
+        return SimpleNamespace(
+            name="batches/test",
+            state=SimpleNamespace(name=self.states.pop(0)),
+            dest=SimpleNamespace(inlined_responses=self.responses),
+        )
+
+    async def create(self, model, src, config):
+        # Run the SDK's own request conversion so schemas it rejects fail here too
+        api_client = genai.Client(api_key="test")._api_client
+        for request in src:
+            batches._InlinedRequest_to_mldev(api_client, request)
+        self.requests = src
+        return self._job()
+
+    async def get(self, name):
+        return self._job()
+
+
+def _ok(payload):
+    return SimpleNamespace(error=None, response=SimpleNamespace(text=payload))
+
+
+@pytest.fixture
+def fake_batches(ledger_db, monkeypatch):
+    monkeypatch.setattr(tools, "_EXTRACTION_CACHE", OrderedDict())
+
+    def install(states, responses):
+        fake = FakeBatches(states, responses)
+        monkeypatch.setattr(tools, "_get_genai_client", lambda: SimpleNamespace(aio=SimpleNamespace(batches=fake)))
+        return fake
+
+    return install
+
+
+TEXTS = [
+    "Amazon paid $40000 for 5 GPUs",
+    "Globex picked up three desks for 900 dollars",
+    "Initech ordered 2 printers, total $500",
+]
+
+
+def test_pending_texts_are_submitted_and_mapped_back_in_order(fake_batches):
+    fake = fake_batches(
+        ["JOB_STATE_RUNNING", "JOB_STATE_SUCCEEDED"],
+        [
+            _ok('{"company_name": "Globex", "amount_paid": 900, "product_name": "desk", "num_units": 3}'),
+            _ok('{"company_name": "Initech", "amount_paid": 500, "product_name": "printer", "num_units": 2}'),
+        ],
+    )
+
+    results = asyncio.run(tools.extract_transactions_batch(TEXTS, poll_interval=0))
+
+    # The fast-path sentence never leaves the process
+    assert [r["contents"][0]["parts"][0]["text"] for r in fake.requests] == TEXTS[1:]
+    assert [r["success"] for r in results] == [True, True, True]
+    assert [r["company_name"] for r in results] == ["Amazon", "Globex", "Initech"]
+    assert results[1]["num_units"] == 3
+
+
+def test_partial_success_reports_failed_and_missing_entries(fake_batches):
+    fake_batches(
+        ["JOB_STATE_PARTIALLY_SUCCEEDED"],
+        [SimpleNamespace(error="quota exceeded", response=None)],
+    )
+
+    results = asyncio.run(tools.extract_transactions_batch(TEXTS, poll_interval=0))
+
+    assert results[0]["success"] is True
+    assert results[1]["error_message"] == "Extraction failed: quota exceeded"
+    assert results[2]["success"] is False
+    assert None not in results
+
+
+def test_constraint_violations_are_rejected_locally(fake_batches):
+    fake_batches(
+        ["JOB_STATE_SUCCEEDED"],
+        [
+            _ok('{"company_name": "Globex", "amount_paid": 0, "product_name": "desk", "num_units": 3}'),
+            _ok('{"company_name": "Initech", "amount_paid": 500, "product_name": "printer", "num_units": 0}'),
+        ],
+    )
+
+    results = asyncio.run(tools.extract_transactions_batch(TEXTS, poll_interval=0))
+
+    assert [r["success"] for r in results] == [True, False, False]
@@ -0,0 +1,42 @@
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+import tools
+
+
+@pytest.fixture
+def llm_calls(ledger_db, monkeypatch):
+    monkeypatch.setattr(tools, "_EXTRACTION_CACHE", OrderedDict())
+    calls = []
+
+    async def fake_llm_extract(text):
+        calls.append(text)
+        return tools.TransactionDetails(company_name="Amazon", amount_paid=40000.0, product_name="GPU", num_units=5)
+
+    monkeypatch.setattr(tools, "_llm_extract", fake_llm_extract)
+    return calls
+
+
+def test_repeated_text_is_served_from_the_cache(llm_calls):
+    text = "Amazon bought 5 GPUs for $40000 in total"
+
+    first = asyncio.run(tools._extract(text))
+    second = asyncio.run(tools._extract("  " + text))
+
+    assert first == second
+    assert llm_calls == [text]
+
+
+@pytest.mark.parametrize("first, second", [
+    # Same numbers, swapped roles of amount and quantity
+    ("Amazon bought 5 GPUs for $40000 in total", "Amazon bought 40000 GPUs for $5 in total"),
+    # Same names and numbers, swapped payer and vendor
+    ("Google paid Amazon $40,000 for 5 GPUs", "Amazon paid Google $40,000 for 5 GPUs"),
+])
+def test_paraphrases_are_never_answered_from_another_extraction(llm_calls, first, second):
+    asyncio.run(tools._extract(first))
+    asyncio.run(tools._extract(second))
+
+    assert llm_calls == [first, second]
@@ -0,0 +1,38 @@
+import pytest
+
+import tools
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Amazon paid $40000 for 5 GPUs", ("Amazon", 40000.0, "GPUs", 5)),
+    ("Amazon spent $40,000.50 for 5 GPUs.", ("Amazon", 40000.5, "GPUs", 5)),
+])
+def test_simple_sentences_skip_the_llm(text, expected):
+    result = tools._fast_extract(text)
+
+    assert result["success"] is True
+    assert (result["company_name"], result["amount_paid"], result["product_name"], result["num_units"]) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Amazon paid $40000 for 5 GPUs and 3 CPUs",
+    "Last week Amazon paid $40000 for 5 GPUs",
+    "Acme Corp paid $40000 for 5 GPUs",
+    "Amazon paid $40000 for 5 GPUs yesterday",
+    "Amazon paid $40000 for 5 GPUs each",
+    "Amazon paid $40000 for 5 each",
+    "Amazon paid $1,2,3 for 5 GPUs",
+    "Amazon paid 40000 for 5 GPUs",
+    "amazon paid $40000 for 5 GPUs",
+    "Customer paid $400 for 5 GPUs",
+    "Nobody paid $400 for 5 GPUs",
+    "Someone paid $400 for 5 GPUs",
+    "He paid $400 for 5 GPUs",
+    "She paid $400 for 5 GPUs",
+    "They paid $400 for 5 GPUs",
+    "Amazon paid $400 for 5 units",
+    "Amazon paid $400 for 5 items",
+    "Amazon paid $400 for 5 pieces",
+])
+def test_ambiguous_sentences_fall_through_to_the_llm(text):
+    assert tools._fast_extract(text) is None
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+import tools
+
+
+@pytest.fixture
+def seeded_ledger(ledger_db):
+    ledger_db.executemany(tools._INSERT_SQL, [(f"Company {i}", 10.0 + i, "Pen", 1) for i in range(60)])
+    return ledger_db
+
+
+@pytest.mark.parametrize("limit, expected", [
+    (10, 10),
+    (-1, 1),
+    (0, 1),
+    (tools.LEDGER_MAX_LIMIT + 1, 60),
+])
+def test_limit_is_clamped(seeded_ledger, limit, expected):
+    rows = list(tools.iter_ledger_rows(limit))
+
+    # All 60 rows share one CURRENT_TIMESTAMP, so only id order picks the newest
+    assert [int(row.split(" | ", 1)[0]) for row in rows] == list(range(60, 60 - expected, -1))
+
+
+def test_get_ledger_data_defaults_to_display_limit(seeded_ledger):
+    ledger = asyncio.run(tools.get_ledger_data.ainvoke({}))
+
+    assert ledger.count(" | Pen      | ") == tools.LEDGER_DISPLAY_LIMIT
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+import tools
+
+
+@pytest.fixture
+def worker(ledger_db):
+    worker = tools.StorageWorker()
+    yield worker
+    worker.close()
+
+
+def test_ids_are_assigned_per_submission(worker):
+    single = worker.submit_nowait(("Amazon", 40000.0, "GPU", 5))
+    bulk = worker.submit_many_nowait([("Azure Interior", 10.0, "Desk", 1), ("Acme", 20.0, "Chair", 2)])
+    last = worker.submit(("Globex", 5.0, "Pen", 3))
+
+    assert single.result(timeout=5) == 1
+    assert bulk.result(timeout=5) == [2, 3]
+    assert last == 4
+
+
+def test_rows_are_visible_after_flush(worker, ledger_db):
+    worker.submit_many_nowait([("Acme", 1.0, "Pen", 1)] * 3)
+    worker.flush()
+
+    assert ledger_db.execute("SELECT COUNT(*) FROM Ledger").fetchone()[0] == 3
+
+
+def test_bad_submission_does_not_fail_its_batch_neighbours(ledger_db):
+    worker = tools.StorageWorker()
+    bad, good, bulk = Future(), Future(), Future()
+
+    # Write one drained batch directly so all three share the first transaction attempt
+    worker._write(ledger_db, [
+        ([(None, 1.0, "Pen", 1)], bad),
+        (("Amazon", 40000.0, "GPU", 5), good),
+        ([("Acme", 1.0, "Pen", 1), ("Acme", 2.0, "Pen", 2)], bulk),
+    ])
+
+    with pytest.raises(tools.sqlite3.IntegrityError):
+        bad.result(timeout=0)
+    assert good.result(timeout=0) == 1
+    assert bulk.result(timeout=0) == [2, 3]
+    assert ledger_db.execute("SELECT COUNT(*) FROM Ledger").fetchone()[0] == 3
+
+
+def test_connect_failure_fails_futures_instead_of_hanging(ledger_db, monkeypatch):
+    def broken_connect():
+        raise tools.sqlite3.OperationalError("unable to open database file")
+
+    monkeypatch.setattr(tools, "_connect", broken_connect)
+    worker = tools.StorageWorker()
+    try:
+        with pytest.raises(tools.sqlite3.OperationalError):
+            worker.submit_nowait(("Amazon", 40000.0, "GPU", 5)).result(timeout=5)
+        # The thread is still alive and keeps answering barriers
+        worker.flush()
+    finally:
+        worker.close()
+
+
+@pytest.mark.parametrize("rows", [
+    [("Amazon", 40000.0, "GPU")],
+    [("Amazon", "forty thousand", "GPU", 5)],
+    [("Amazon", None, "GPU", 5)],
+])
+def test_bulk_create_reports_malformed_rows(ledger_db, rows):
+    result = asyncio.run(tools.create_invoices_bulk(rows))
+
+    assert result["success"] is False
+    assert result["invoice_ids"] == []
+    assert result["error_message"].startswith("Invalid invoice row")
+
+
+def test_create_invoice_returns_the_committed_row(worker, monkeypatch):
+    monkeypatch.setattr(tools, "_WORKER", worker)
+
+    result = asyncio.run(tools.create_invoice.ainvoke(
+        {"company_name": "Amazon", "amount_paid": 40000.0, "product_name": "GPU", "num_units": 5}
+    ))
+
+    assert result["success"] is True
+    assert result["invoice_id"] == 1
+    assert result["timestamp"] is not None
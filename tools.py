@@ -1,43 +1,95 @@
-import os
-import random
-import json
+import re
+import functools
+import hashlib
+import orjson
 from langchain_core.tools import tool
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
-from typing import List
-from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage
+from typing import Iterator, List
 import sqlite3
-from langchain_core.prompts import PromptTemplate
-from typing import TypedDict, Optional
+import atexit
+import asyncio
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional
 from pydantic import BaseModel, Field
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+# Clients are built on first use so importing this module stays cheap
+
+@functools.cache
+def _get_llm():
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
+
 
 # Database setup
 DATABASE_FILE = "ledger_test.db"
 
+# Shared connection, opened once by setup_database(). Used for reads and for
+# ExtractionCache writes (serialized by _CONN_WRITE_LOCK); Ledger writes go
+# through the StorageWorker's own connection.
+_CONN: Optional[sqlite3.Connection] = None
+_CONN_WRITE_LOCK = threading.Lock()
+
+# Max rows the storage worker writes per transaction
+BATCH_SIZE = 64
+
+# Number of most recent ledger rows shown by get_ledger_data, and the most it may be asked for
+LEDGER_DISPLAY_LIMIT = 50
+LEDGER_MAX_LIMIT = 500
+
+# Rows pulled from SQLite per fetchmany() while formatting the ledger; kept below
+# LEDGER_MAX_LIMIT so large reads really are split into several fetches
+FETCH_BATCH_SIZE = 100
+
+# Hot-path SQL, kept as constants so every call hits sqlite3's per-connection statement cache
+_INSERT_SQL = "INSERT INTO Ledger (company_name, amount_paid, product_name, num_units) VALUES (?, ?, ?, ?)"
+_TIMESTAMP_SQL = "SELECT timestamp FROM Ledger WHERE id = ?"
+_LEDGER_SQL = (
+    "SELECT id, company_name, amount_paid, product_name, num_units, timestamp "
+    "FROM Ledger ORDER BY id DESC LIMIT ?"
+)
+_CACHE_GET_SQL = "SELECT value FROM ExtractionCache WHERE key = ?"
+_CACHE_PUT_SQL = "INSERT OR REPLACE INTO ExtractionCache (key, value) VALUES (?, ?)"
+# INSERT OR REPLACE gives a rewritten key a fresh rowid, so rowid order is recency order
+_CACHE_EVICT_SQL = "DELETE FROM ExtractionCache WHERE rowid <= (SELECT MAX(rowid) FROM ExtractionCache) - ?"
+
+# Upper bound on entries kept in the persistent ExtractionCache table (oldest evicted first)
+DISK_CACHE_SIZE = 10_000
+
 
 #------------------------------------------------------------------------------------------------------------
 
-async def setup_database():
+def _connect() -> sqlite3.Connection:
     """
-    Initializes the SQLite database and creates the Ledger table for invoice storage.
-    
-    Creates a table with columns: id, company_name, amount_paid, product_name, 
-    num_units, and timestamp. Uses 'ledger_test.db' as the database file.
-    
-    Returns:
-        None: Prints setup confirmation message
-    
-    Note:
-        Table is created with IF NOT EXISTS to prevent errors on repeated calls.
+    Opens an autocommit SQLite connection with WAL journaling, so readers
+    never block behind the writer and each commit avoids a full fsync.
+    """
+    conn = sqlite3.connect(DATABASE_FILE, check_same_thread=False, isolation_level=None, cached_statements=128)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Returns the shared connection, opening it on first use.
     """
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
+    global _CONN
+    if _CONN is None:
+        _CONN = _connect()
+    return _CONN
+
+
+def _create_schema():
+    conn = _get_connection()
     
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Ledger (
             id INTEGER PRIMARY KEY,
             company_name TEXT NOT NULL,
@@ -47,11 +99,184 @@ async def setup_database():
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     """)
-    conn.commit()
-    conn.close()
+    # Newest-first reads walk the INTEGER PRIMARY KEY backwards (timestamps tie within a
+    # second), so the old timestamp index only slowed writes down
+    conn.execute("DROP INDEX IF EXISTS idx_ledger_ts")
+    # Persistent exact-match cache of successful extractions
+    conn.execute("CREATE TABLE IF NOT EXISTS ExtractionCache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+
+async def setup_database():
+    """
+    Initializes the SQLite database and creates the Ledger table for invoice storage.
+    
+    Creates a table with columns: id, company_name, amount_paid, product_name, 
+    num_units, and timestamp, and the ExtractionCache table. Uses 'ledger_test.db' as the database file.
+    
+    Returns:
+        None: Prints setup confirmation message
+    
+    Note:
+        Table is created with IF NOT EXISTS to prevent errors on repeated calls.
+        The connection is kept open and reused by the tools below. The blocking
+        SQLite work runs in a worker thread so awaiting this never stalls the loop.
+    """
+    await asyncio.to_thread(_create_schema)
     # print(f"[DB SETUP] Database '{DATABASE_FILE}' initialized and 'Ledger' table ready.")    
 
+
+class StorageWorker:
+    """
+    Single writer thread for the Ledger table.
+    
+    SQLite allows one writer at a time, so every INSERT goes through this
+    worker's queue. It drains whatever has queued up (up to BATCH_SIZE rows)
+    and writes it with executemany in one transaction, keeping blocking
+    fsyncs off the asyncio event loop.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+    
+    def submit_nowait(self, row: Optional[tuple]) -> Future:
+        """
+        Queues a (company_name, amount_paid, product_name, num_units) row.
+        
+        Passing None queues a barrier that resolves once everything queued
+        before it has been committed.
+        
+        Returns:
+            Future: Resolves to the new invoice id (None for a barrier)
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((row, future))
+        return future
+    
+    def submit(self, row: tuple) -> int:
+        """Queues a row and blocks until it is committed. Returns the invoice id."""
+        return self.submit_nowait(row).result()
     
+    def submit_many_nowait(self, rows: List[tuple]) -> Future:
+        """
+        Queues several rows to be written together in a single transaction.
+        
+        Returns:
+            Future: Resolves to the list of new invoice ids, in row order
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((list(rows), future))
+        return future
+    
+    def flush(self):
+        """Blocks until every row queued so far has been committed."""
+        if self._thread is not None:
+            self.submit_nowait(None).result()
+    
+    def close(self):
+        """Commits outstanding rows and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put((self._STOP, None))
+            self._thread.join()
+            self._thread = None
+    
+    def _drain(self, first: tuple) -> List[tuple]:
+        items = [first]
+        while len(items) < BATCH_SIZE:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+    
+    def _run(self):
+        conn: Optional[sqlite3.Connection] = None
+        try:
+            while True:
+                items = self._drain(self._queue.get())
+                stop = any(row is self._STOP for row, _ in items)
+                writes = [(row, future) for row, future in items if row is not None and row is not self._STOP]
+                try:
+                    if writes:
+                        if conn is None:
+                            conn = _connect()
+                        self._write(conn, writes)
+                except Exception as e:
+                    # Never let the thread die with callers still waiting on their futures
+                    self._fail(writes, e)
+                for row, future in items:
+                    if row is None:
+                        future.set_result(None)
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    @staticmethod
+    def _fail(writes: List[tuple], exc: BaseException):
+        for _, future in writes:
+            if not future.done():
+                future.set_exception(exc)
+    
+    @staticmethod
+    def _rows(item) -> List[tuple]:
+        # A bulk submission is a list of rows; a single submission is one row tuple
+        return item if isinstance(item, list) else [item]
+    
+    @staticmethod
+    def _resolve(item, future: Future, ids: List[int]):
+        future.set_result(ids if isinstance(item, list) else ids[0])
+    
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: List[tuple]) -> List[int]:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT_SQL, rows)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        # The writer holds the lock for the whole transaction, so its ids are contiguous
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    
+    def _write(self, conn: sqlite3.Connection, writes: List[tuple]):
+        try:
+            ids = self._insert(conn, [row for item, _ in writes for row in self._rows(item)])
+        except Exception:
+            if len(writes) == 1:
+                raise
+            # Retry each submission in its own transaction so one bad row only fails its own caller
+            for item, future in writes:
+                try:
+                    self._resolve(item, future, self._insert(conn, self._rows(item)))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        
+        next_idx = 0
+        for item, future in writes:
+            count = len(self._rows(item))
+            self._resolve(item, future, ids[next_idx:next_idx + count])
+            next_idx += count
+
+
+_WORKER = StorageWorker()
+atexit.register(_WORKER.close)
+
 
 #---------------------------------------------PYDANTIC SCHEMA-------------------------------------------------------
 class TransactionDetails(BaseModel):
@@ -61,8 +286,199 @@ class TransactionDetails(BaseModel):
     num_units: int = Field(ge=1, description="The quantity of the product purchased") # ge=1 means "Greater Than or Equal To 1"
 
 
+async def create_invoices_bulk(rows: List[tuple]) -> dict:
+    """
+    Stores many invoices in one transaction with a single executemany.
+    
+    Args:
+        rows (list[tuple]): (company_name, amount_paid, product_name, num_units) per invoice
+        
+    Returns:
+        dict: {invoice_ids: list[int], count: int, success: bool, error_message: str}
+    """
+    if not rows:
+        return {"invoice_ids": [], "count": 0, "success": True, "error_message": None}
+    
+    try:
+        clean = [(company, float(amount), product, int(units)) for company, amount, product, units in rows]
+    except (ValueError, TypeError) as e:
+        return {"invoice_ids": [], "count": 0, "success": False, "error_message": f"Invalid invoice row: {e}"}
+    
+    try:
+        invoice_ids = await asyncio.wrap_future(_WORKER.submit_many_nowait(clean))
+    except sqlite3.Error as e:
+        return {"invoice_ids": [], "count": 0, "success": False, "error_message": f"Database error: {e}"}
+    
+    return {"invoice_ids": invoice_ids, "count": len(invoice_ids), "success": True, "error_message": None}
+
+
+# Gemini returns a validated TransactionDetails directly; built once rather than per call
+@functools.cache
+def _get_structured_llm():
+    return _get_llm().with_structured_output(TransactionDetails)
+
+
 #--------------------------------------------------------------------------------------------------------------------
+
+# Fast path for the common "<Company> paid $<amount> for <n> <product>" phrasing.
+# Deliberately narrow: a single capitalised company word, a "$" amount with proper
+# thousands grouping, and a single-word product ending the sentence. Anything else
+# (extra clauses, multi-word names, several products) goes to the LLM.
+_FAST_PATH = re.compile(
+    r"^(?P<co>[A-Z][A-Za-z0-9&.'-]*)\s+(?i:paid|spent|bought)\s+"
+    r"\$(?P<amt>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d{1,2})?)\s+(?i:for)\s+"
+    r"(?P<n>\d+)\s+(?!(?i:and|for|per|each)\b)(?P<prod>[A-Za-z]+)\s*\.?$"
+)
+
+# Words the grammar would accept that are not real names: pronouns and generic
+# parties in the company slot, unit/container words in the product slot
+_NOT_A_COMPANY = frozenset({
+    "i", "we", "you", "he", "she", "they", "it", "someone", "somebody", "nobody",
+    "everyone", "anyone", "customer", "client", "buyer", "seller", "vendor",
+    "company", "user", "the", "a", "an", "my", "our", "their", "his", "her", "this", "that",
+})
+_NOT_A_PRODUCT = frozenset({
+    "unit", "units", "item", "items", "piece", "pieces", "pcs", "thing", "things",
+    "product", "products", "goods", "stuff", "box", "boxes", "pack", "packs",
+    "pair", "pairs", "set", "sets", "lot", "lots", "times",
+})
+
+
+def _fast_extract(text: str) -> Optional[dict]:
+    """
+    Parses simple transaction sentences without calling the LLM.
+    
+    Returns:
+        dict | None: Same shape as extract_transaction_details' result, or None
+        if the text does not match the fast-path grammar
+    """
+    match = _FAST_PATH.match(text.strip())
+    if match is None or match["co"].lower() in _NOT_A_COMPANY or match["prod"].lower() in _NOT_A_PRODUCT:
+        return None
+    try:
+        result = TransactionDetails(
+            company_name=match["co"].strip(),
+            amount_paid=float(match["amt"].replace(",", "")),
+            product_name=match["prod"].strip(),
+            num_units=int(match["n"]),
+        )
+    except ValueError:
+        # e.g. a zero amount or quantity; let the LLM path report it
+        return None
+    return {
+        **result.model_dump(),
+        "success": True,
+        "function_call_success": True,
+        "error_message": None
+    }
+
+
+# Successful extractions keyed by whitespace-normalized input text (LRU)
+_EXTRACTION_CACHE: "OrderedDict[str, dict]" = OrderedDict()
+EXTRACTION_CACHE_SIZE = 1024
+
+
+def _cache_key(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _remember(key: str, details: dict):
+    _EXTRACTION_CACHE[key] = details
+    if len(_EXTRACTION_CACHE) > EXTRACTION_CACHE_SIZE:
+        _EXTRACTION_CACHE.popitem(last=False)
+
+
+def _disk_key(key: str) -> str:
+    return hashlib.blake2b(f"extract_transaction_details:{key}".encode(), digest_size=16).hexdigest()
+
+
+def _disk_get(key: str) -> Optional[dict]:
+    try:
+        row = _get_connection().execute(_CACHE_GET_SQL, (_disk_key(key),)).fetchone()
+    except sqlite3.Error:
+        # A missing cache table (setup_database not run yet) is just a miss
+        return None
+    return orjson.loads(row[0]) if row else None
+
+
+def _disk_put(key: str, details: dict):
+    try:
+        with _CONN_WRITE_LOCK:
+            conn = _get_connection()
+            conn.execute(_CACHE_PUT_SQL, (_disk_key(key), orjson.dumps(details).decode()))
+            conn.execute(_CACHE_EVICT_SQL, (DISK_CACHE_SIZE,))
+    except sqlite3.Error:
+        pass
+
+
+def _extraction_failed(reason: str) -> dict:
+    return {
+        "company_name": "",
+        "amount_paid": 0.0,
+        "product_name": "",
+        "num_units": 0,
+        "success": False,
+        "function_call_success": False,
+        "error_message": f"Extraction failed: {reason}"
+    }
+
+
+# Transaction descriptions are a sentence or two; anything far longer is rejected
+# before it is sent (and billed) rather than failing after a full round-trip
+MAX_EXTRACTION_CHARS = 4000
+
+
+def _reject_input(text: str) -> Optional[dict]:
+    """Returns a failure result for input that should never reach the LLM, else None."""
+    if not text.strip():
+        return _extraction_failed("empty input")
+    if len(text) > MAX_EXTRACTION_CHARS:
+        return _extraction_failed(f"input is {len(text)} characters; the limit is {MAX_EXTRACTION_CHARS}")
+    return None
+
+
+async def _llm_extract(text: str) -> TransactionDetails:
+    return await _get_structured_llm().ainvoke(text)
+
+
+async def _extract(text: str) -> dict:
+    rejected = _reject_input(text)
+    if rejected is not None:
+        return rejected
+    
+    fast = _fast_extract(text)
+    if fast is not None:
+        return fast
+    
+    key = _cache_key(text)
+    cached = _EXTRACTION_CACHE.get(key)
+    if cached is not None:
+        _EXTRACTION_CACHE.move_to_end(key)
+        return dict(cached)
+    
+    cached = await asyncio.to_thread(_disk_get, key)
+    if cached is not None:
+        _remember(key, cached)
+        return dict(cached)
     
+    try:
+        result = await _llm_extract(text)
+        details = {
+            **result.model_dump(), # converts the Pydantic object into a clean Python dictionary
+            "success": True,
+            "function_call_success": True,
+            "error_message": None
+        }
+        # Only successful extractions are cached so transient failures get retried
+        _remember(key, details)
+        await asyncio.to_thread(_disk_put, key, details)
+        return dict(details)
+    except Exception as e:
+        # If the AI hallucinates a string where a float should be, 
+        # Pydantic catches it here instead of crashing the program.
+        return _extraction_failed(str(e))
+
+
 @tool
 async def extract_transaction_details(text: str) -> dict:
     """
@@ -75,29 +491,143 @@ async def extract_transaction_details(text: str) -> dict:
         dict: Structured transaction data with company_name, amount_paid, 
         product_name, num_units, success status, and error handling.
     """
+    return await _extract(text)
+
+
+async def extract_transactions(texts: List[str], max_concurrency: int = 10, use_batch_api: bool = False) -> List[dict]:
+    """
+    Extracts many transactions concurrently.
+    
+    At most max_concurrency Gemini requests are in flight at once to stay
+    within the provider's rate limits; transient 429/5xx errors are retried
+    with exponential backoff by the ChatGoogleGenerativeAI client itself.
+    
+    Args:
+        texts (list[str]): One transaction description per entry
+        max_concurrency (int): Maximum number of simultaneous LLM calls
+        use_batch_api (bool): Submit the texts as one Gemini batch job instead
+            (half the cost, but results can take minutes; for offline workloads)
+        
+    Returns:
+        list[dict]: One extract_transaction_details-style result per text, in input order
+    """
+    if use_batch_api:
+        return await extract_transactions_batch(texts)
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    structured_llm = llm.with_structured_output(TransactionDetails)
+    async def run(text: str) -> dict:
+        async with semaphore:
+            return await _extract(text)
+    
+    return await asyncio.gather(*(run(text) for text in texts))
+
+
+_BATCH_DONE_STATES = frozenset({
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED",
+})
+# States whose inlined responses are worth reading; failed entries carry their own error
+_BATCH_RESULT_STATES = frozenset({"JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"})
+
+# google-genai's Schema type rejects constraint keywords such as exclusiveMinimum, so the
+# batch requests send the plain JSON schema and model_validate_json enforces the constraints
+_BATCH_RESPONSE_SCHEMA = TransactionDetails.model_json_schema()
+
+
+@functools.cache
+def _get_genai_client():
+    # Imported here so the batch SDK is only loaded by offline workloads
+    from google import genai
+    return genai.Client()
+
+
+async def extract_transactions_batch(texts: List[str], poll_interval: float = 30.0) -> List[dict]:
+    """
+    Extracts many transactions through Gemini's asynchronous batch API.
+    
+    Texts answered by the fast path or the exact-match caches are resolved
+    locally; the rest are submitted as a single batch job, which is polled
+    every poll_interval seconds until it finishes.
+    
+    Args:
+        texts (list[str]): One transaction description per entry
+        poll_interval (float): Seconds between job status checks
+        
+    Returns:
+        list[dict]: One extract_transaction_details-style result per text, in input order
+    """
+    results: List[Optional[dict]] = [None] * len(texts)
+    pending: List[int] = []
+    for idx, text in enumerate(texts):
+        key = _cache_key(text)
+        hit = (
+            _reject_input(text)
+            or _fast_extract(text)
+            or _EXTRACTION_CACHE.get(key)
+            or await asyncio.to_thread(_disk_get, key)
+        )
+        if hit is None:
+            pending.append(idx)
+        else:
+            results[idx] = dict(hit)
+    
+    if not pending:
+        return results
+    
+    requests = [
+        {
+            "contents": [{"parts": [{"text": texts[idx]}], "role": "user"}],
+            "config": {"response_mime_type": "application/json", "response_json_schema": _BATCH_RESPONSE_SCHEMA},
+        }
+        for idx in pending
+    ]
     
     try:
-        result = await structured_llm.ainvoke(text)
-        return {
-            **result.model_dump(), # converts the Pydantic object into a clean Python dictionary
+        client = _get_genai_client()
+        job = await client.aio.batches.create(
+            model="gemini-2.5-flash",
+            src=requests,
+            config={"display_name": "bulwark-transaction-extraction"},
+        )
+        while job.state.name not in _BATCH_DONE_STATES:
+            await asyncio.sleep(poll_interval)
+            job = await client.aio.batches.get(name=job.name)
+    except Exception as e:
+        for idx in pending:
+            results[idx] = _extraction_failed(str(e))
+        return results
+    
+    if job.state.name not in _BATCH_RESULT_STATES:
+        for idx in pending:
+            results[idx] = _extraction_failed(f"batch job ended in {job.state.name}")
+        return results
+    
+    responses = (job.dest and job.dest.inlined_responses) or []
+    for idx in pending[len(responses):]:
+        results[idx] = _extraction_failed("no response returned by the batch job")
+    
+    for idx, response in zip(pending, responses):
+        if response.error or response.response is None:
+            results[idx] = _extraction_failed(str(response.error or "empty response"))
+            continue
+        try:
+            result = TransactionDetails.model_validate_json(response.response.text)
+        except ValueError as e:
+            results[idx] = _extraction_failed(str(e))
+            continue
+        details = {
+            **result.model_dump(),
             "success": True,
             "function_call_success": True,
             "error_message": None
         }
-    except Exception as e:
-        # If the AI hallucinates a string where a float should be, 
-        # Pydantic catches it here instead of crashing the program.
-        return {
-            "company_name": "",
-            "amount_paid": 0.0,
-            "product_name": "",
-            "num_units": 0,
-            "success": False,
-            "function_call_success": False,
-            "error_message": f"Extraction failed: {str(e)}"
-        }
+        key = _cache_key(texts[idx])
+        _remember(key, details)
+        await asyncio.to_thread(_disk_put, key, details)
+        results[idx] = dict(details)
+    
+    return results
 
 
 #-------------------------------------------------------------------------------------------------
@@ -118,21 +648,12 @@ async def create_invoice(company_name: str, amount_paid: float,
         dict: {invoice_id: int, success: bool, error_message: str}
     """
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """
-            INSERT INTO Ledger (company_name, amount_paid, product_name, num_units)
-            VALUES (?, ?, ?, ?)
-            """,
-            (company_name, float(amount_paid), product_name, int(num_units))
-        )
-        conn.commit()
+        row = (company_name, float(amount_paid), product_name, int(num_units))
+        invoice_id = await asyncio.wrap_future(_WORKER.submit_nowait(row))
 
-        invoice_id = cursor.lastrowid
-        cursor.execute("SELECT timestamp FROM Ledger WHERE id = ?", (invoice_id,))
-        ts_row = cursor.fetchone()
+        ts_row = await asyncio.to_thread(
+            lambda: _get_connection().execute(_TIMESTAMP_SQL, (invoice_id,)).fetchone()
+        )
         timestamp = ts_row[0] if ts_row else None
 
         return {
@@ -151,46 +672,67 @@ async def create_invoice(company_name: str, amount_paid: float,
             "error_message": f"Database error: {e}",
             "timestamp": None,
         }
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
 
 
 #----------------------------------------------------------------------------------------------
 
+_LEDGER_TITLE = "\n=== Current Ledger ==="
+_LEDGER_HEADER = "ID | Company Name        | Amount Paid | Product   | Units | Timestamp"
+_LEDGER_DIVIDER = "-" * 75
+# Row template shared by every ledger line
+_ROW_FMT = "{0:2} | {1:<18} | ${2:>9,.2f} | {3:<8} | {4:>5} | {5}"
+
+
+def iter_ledger_rows(limit: int = LEDGER_DISPLAY_LIMIT) -> Iterator[str]:
+    """
+    Yields formatted ledger rows, newest first.
+    
+    Rows are pulled from SQLite FETCH_BATCH_SIZE at a time, so the raw result
+    tuples are never all held at once. Callers that join the lines, such as
+    get_ledger_data, still build the whole table string in memory.
+    """
+    # The LLM chooses limit; SQLite treats a negative LIMIT as "no limit", so clamp it
+    limit = max(1, min(int(limit), LEDGER_MAX_LIMIT))
+    cursor = _get_connection().execute(_LEDGER_SQL, (limit,))
+    while True:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            yield _ROW_FMT.format(*row)
+
+
+def _format_ledger(limit: int) -> str:
+    try:
+        _WORKER.flush()
+        
+        # Build string instead of printing; joined once at the end
+        parts = [_LEDGER_TITLE, _LEDGER_HEADER, _LEDGER_DIVIDER]
+        parts.extend(iter_ledger_rows(limit))
+        parts.append(_LEDGER_DIVIDER)
+
+        return "\n".join(parts) + "\n"
+    except sqlite3.Error as e:
+        return f"Error displaying ledger: {e}"
+
+
 @tool
-def get_ledger_data(): 
+async def get_ledger_data(limit: int = LEDGER_DISPLAY_LIMIT): 
     """
-    Retrieves and formats all invoice records from the database.
+    Retrieves and formats the most recent invoice records from the database.
     
     Queries the Ledger table and returns a formatted string containing
-    all transaction records sorted by timestamp (newest first).
+    the latest records, newest first (by invoice id, since timestamps only
+    have one-second resolution).
+    
+    Args:
+        limit (int): Maximum number of records to show (default 50, clamped to 1-500)
     
     Returns:
         str: Formatted ledger table with ID, company name, amount,
-             product, units, and timestamp for all records
+             product, units, and timestamp for each record
              
     Note:
-        Prints formatted table directly to console for user display.
+        The query runs in a worker thread so it does not block the event loop.
     """
-    try:
-        conn = sqlite3.connect(DATABASE_FILE)
-
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Ledger ORDER BY timestamp DESC")
-        rows = cursor.fetchall()
-        
-        # Build string instead of printing
-        ledger_str = "\n=== Current Ledger ===\n"
-        ledger_str += "ID | Company Name        | Amount Paid | Product   | Units | Timestamp\n"
-        ledger_str += "-" * 75 + "\n"
-        for row in rows:
-            ledger_str += f"{row[0]:2} | {row[1]:<18} | ${row[2]:>9,.2f} | {row[3]:<8} | {row[4]:>5} | {row[5]}\n"
-        ledger_str += "-" * 75 + "\n"
-
-        return ledger_str
-    except sqlite3.Error as e:
-        return f"Error displaying ledger: {e}"
-    finally:
-        if 'conn' in locals() and conn:
-            conn.close()
\ No newline at end of file
+    return await asyncio.to_thread(_format_ledger, limit)
\ No newline at end of file